@@ -6,5 +6,5 @@ SnapMerge
 This tool was last tested with the official Snapchat “Download My Data” export as of December 2025. If Snapchat changes its export format, please open an issue on [GitHub](https://github.com/JaxRaffnix/SnapMerge/issues).
 """
 
-from .core import process_data, combine_media, get_media_and_overlay_file
+from .core import process_data, combine_media, combine_media_batch, get_media_and_overlay_file
 # from .cli import *
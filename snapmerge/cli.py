@@ -1,8 +1,10 @@
 from pathlib import Path
+from typing import Optional
 
 import typer
 
 from .core import process_data
+from .helpers import _already_exists, _existing_stems, _get_video_encoder, _pillow_simd_active
 
 app = typer.Typer(
     help="Restore Snapchat images and videos by merging media with overlays."
@@ -23,11 +25,12 @@ def confirm_overwrite(path: Path, overwrite: bool) -> bool:
     if overwrite:
         return True
 
-    if not path.parent.exists():
+    # one directory scan, a missing directory has no conflicting files
+    try:
+        existing = _existing_stems(path.parent)
+    except FileNotFoundError:
         return True
-
-    existing = list(path.parent.glob(f"{path.stem}.*"))
-    return len(existing) == 0
+    return not _already_exists(path.stem, existing)
 
 
 # ___________________________________________________________________
@@ -40,9 +43,13 @@ def main(
     output: Path = typer.Argument(..., help="Output directory for reconstructed media"),
     overwrite: bool = typer.Option(False, help="Overwrite existing output files (any extension)"),
     dry_run: bool = typer.Option(False, help="Show what would be processed without writing files"),
+    hwaccel: str = typer.Option("auto", help="Video encoder: 'auto' (hardware if available), 'none' (libx264) or an ffmpeg encoder name"),
+    preserve_times: bool = typer.Option(False, help="Keep timestamps of copied files"),
+    quality: int = typer.Option(85, min=1, max=100, help="Quality of combined JPEG and WebP images"),
+    workers: Optional[int] = typer.Option(None, min=1, help="Number of worker processes (default: one per CPU core)"),
     verbose: bool = typer.Option(False, help="Enable verbose output"),
 ) -> int:
-    if not input.exists() or not input.is_dir():
+    if not input.is_dir():
         typer.echo(f"Error: input directory does not exist: {input}", err=True)
         raise typer.Exit(code=1)
 
@@ -53,13 +60,15 @@ def main(
         typer.echo(f"Output directory: {output}")
         typer.echo(f"Overwrite        : {overwrite}")
         typer.echo(f"Dry run          : {dry_run}")
+        typer.echo(f"Video encoder    : {_get_video_encoder(hwaccel)}")
+        typer.echo(f"Pillow-SIMD      : {_pillow_simd_active()}")
         typer.echo()
 
     try:
         if dry_run:
             typer.echo("Dry run mode enabled — no files will be written.")
 
-        process_data(input_dir=input, output_dir=output)
+        process_data(input_dir=input, output_dir=output, hwaccel=hwaccel, workers=workers, preserve_times=preserve_times, quality=quality)
 
     except Exception as exc:
         typer.echo(f"Error: {exc}", err=True)
@@ -1,13 +1,63 @@
+import io
+import multiprocessing
+import os
 import tempfile
-from pathlib import Path
+import zipfile
+from pathlib import Path, PurePosixPath
 import shutil
-from contextlib import contextmanager
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import Iterable, Optional, Union
 import warnings
 
+import numpy as np
 from PIL import Image
-from moviepy import VideoFileClip, ImageClip, CompositeVideoClip
+from moviepy.config import FFMPEG_BINARY
+try:
+    import pyvips
+except (ImportError, OSError):  # optional, Pillow is used instead
+    pyvips = None
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420, TJFLAG_PROGRESSIVE
+    _turbojpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # optional, Pillow encodes JPEGs instead
+    _turbojpeg = None
+try:
+    from numba import njit, prange
+except ImportError:  # optional, Pillow blends instead
+    njit = None
 
-from .helpers import _is_image, _is_video, _is_media, _get_image_extension, _already_exists, _is_archive
+from .helpers import IMAGE_EXT, _is_image, _is_video, _get_image_extension, _already_exists, _existing_stems, _is_archive, _video_infos, _get_video_encoder, SOFTWARE_ENCODER
+
+
+# Consumer GPUs only allow a few concurrent encoder sessions, so hardware encodes
+# take a slot of a semaphore that process_data shares with its worker processes.
+# None outside of worker processes, encodes are then only limited if the caller passes slots.
+MAX_HARDWARE_ENCODES = 2
+_hardware_encoder_slots = None
+
+# Threads per ffmpeg process, 0 lets ffmpeg use all cores. Worker processes of
+# process_data get a share of the cores so parallel encodes don't oversubscribe the CPU.
+# The same share limits libvips in the workers.
+_ffmpeg_threads = 0
+
+# Worker processes of process_data blend with the serial Numba kernel, together they already use all cores.
+_parallel_blend = True
+
+# Output formats written with libvips when pyvips is installed.
+VIPS_FORMATS = frozenset({"jpeg", "png", "webp"})
+
+# An image file on disk or an archive member read into memory.
+ImageSource = Union[Path, io.BytesIO]
+
+# Default quality of lossy outputs (JPEG, WebP).
+JPEG_QUALITY = 85
+
+# Pillow modes without an alpha channel, media in these modes is fully opaque.
+OPAQUE_MODES = frozenset({"1", "L", "P", "RGB", "CMYK", "YCbCr", "LAB", "HSV"})
 
 
 # ___________________________________________________________________
@@ -32,16 +82,26 @@ def get_media_and_overlay_file(dir_path: Path) -> tuple[Path, Path]:
         ValueError: If the specified directory does not exist, is not a directory, 
                      or does not contain the required media and overlay files exactly once.
     """ 
-    if not dir_path.exists() or not dir_path.is_dir():
+    if not dir_path.is_dir():
         raise ValueError(f"Directory does not exist: {dir_path}")
 
-    files = list(dir_path.iterdir())
+    # one pass over the directory, only files whose name matches are probed. The scan already
+    # knows they are files, so a known image extension is accepted without another stat.
+    overlays, media = [], []
+    with os.scandir(dir_path) as it:
+        for e in it:
+            name = e.name.lower()
+            if ("overlay" not in name and "main" not in name) or not e.is_file():
+                continue
+            path = Path(e.path)
+            is_image = path.suffix.lower() in IMAGE_EXT or _is_image(path)
+            if "overlay" in name and is_image:
+                overlays.append(path)
+            if "main" in name and (is_image or _is_video(path)):
+                media.append(path)
 
-    overlays = [f for f in files if "overlay" in f.name.lower() and _is_image(f)]
     if len(overlays) != 1:
         raise ValueError(f"Expected exactly 1 overlay file, found {len(overlays)} in {dir_path}")
-
-    media = [f for f in files if "main" in f.name.lower() and _is_media(f)]
     if len(media) != 1:
         raise ValueError(f"Expected exactly 1 media file, found {len(media)} in {dir_path}")
 
@@ -59,7 +119,7 @@ def _unpack_archive(archive_path: Path):
     The caller is responsible for processing the extracted files.
     The temporary directory is cleaned up automatically.
     """
-    if not archive_path.exists() or not archive_path.is_file():
+    if not archive_path.is_file():
         raise FileNotFoundError(f"Archive dir not found: {archive_path}")
     if not _is_archive(archive_path):
         raise ValueError(f"Unsupported archive format: {archive_path}")
@@ -74,18 +134,316 @@ def _unpack_archive(archive_path: Path):
         yield tmp_path
 
 
-def combine_media(media_path: Path, overlay_path: Path, output_path: Path) -> Path:
+def _smart_resize(image: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """
+    Resize an image with bilinear resampling.
+
+    Downscales by 2x or more first box-reduce by an integer factor (reducing_gap), so the
+    filter only runs on the reduced image. Upscales are not affected by the gap. Bilinear is
+    the resampler Pillow-SIMD vectorizes best and matches the libvips path.
+    """
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def _fit_overlay(overlay: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Convert an overlay to RGBA and resize it to the media size if necessary."""
+    # a JPEG overlay larger than the media is decoded at 1/2, 1/4 or 1/8 scale by libjpeg,
+    # never below the target size. No-op for other formats.
+    overlay.draft("RGB", size)
+    overlay = overlay.convert("RGBA")
+    if overlay.size != size:
+        overlay = _smart_resize(overlay, size)
+    return overlay
+
+
+@lru_cache(maxsize=1)
+def _load_overlay(path: str, mtime_ns: int, size: tuple[int, int]) -> Image.Image:
+    """
+    Decode an overlay file and fit it to the given size.
+
+    Cached by path, modification time and target size, the returned image is shared and must
+    not be modified. Only the last overlay is kept: it is reused when consecutive merges share
+    an overlay file (e.g. a watermark in `combine_media_batch`), while Snapchat entries each
+    have their own overlay and a larger cache would only pin several MB per entry.
+    """
+    with Image.open(path) as overlay:
+        return _fit_overlay(overlay, size)
+
+
+def _prepare_overlay(source: ImageSource, size: tuple[int, int]) -> Image.Image:
+    """Return the overlay as RGBA image of the given size, files go through the overlay cache."""
+    if isinstance(source, Path):
+        return _load_overlay(str(source), source.stat().st_mtime_ns, size)
+    with Image.open(source) as overlay:
+        return _fit_overlay(overlay, size)
+
+
+def _overlay_image(media_source: ImageSource, overlay_source: ImageSource, output_path: Path, quality: int = JPEG_QUALITY) -> Path:
+    """
+    Alpha composite an overlay onto an image and save it in the format of the media.
+
+    Uses libvips when pyvips is installed, Pillow otherwise.
+    """
+    with Image.open(media_source) as media:
+        ext = media.format.lower()
+        output_path = output_path.with_suffix(f".{ext}")
+
+        if pyvips is None or ext not in VIPS_FORMATS:
+            overlay = _prepare_overlay(overlay_source, media.size)
+            # bounding box of the visible overlay pixels, outside of it the media is kept as is
+            box = overlay.getbbox()
+
+            if media.mode in OPAQUE_MODES and "transparency" not in media.info:
+                # opaque media stays RGB, no RGBA copy and no final conversion pass
+                media = media if media.mode == "RGB" else media.convert("RGB")
+                if box is None:
+                    combined = media
+                elif njit is not None:
+                    combined = _blend_opaque(media, overlay, box)
+                else:
+                    region = overlay.crop(box)
+                    media.paste(region, box, mask=region)
+                    combined = media
+            else:
+                combined = media.convert("RGBA")
+                if box is not None:
+                    combined.alpha_composite(overlay, dest=box[:2], source=box)
+                combined = combined.convert("RGB")
+            _save_image(combined, output_path, quality)
+            return output_path
+
+    _overlay_image_vips(media_source, overlay_source, output_path, quality)
+    return output_path
+
+
+if njit is not None:
+    # compiled on first use, cache=True keeps the machine code on disk for later runs and workers
+    @njit(fastmath=True, cache=True, nogil=True)
+    def _blend_row(media, overlay, out, y):
+        for x in range(media.shape[1]):
+            alpha = overlay[y, x, 3] / np.float32(255.0)
+            for c in range(3):
+                out[y, x, c] = np.uint8(overlay[y, x, c] * alpha + media[y, x, c] * (np.float32(1.0) - alpha) + np.float32(0.5))
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _blend_rows(media, overlay, out):
+        for y in prange(media.shape[0]):
+            _blend_row(media, overlay, out, y)
+
+    # Numba's workqueue threading layer aborts and TBB hangs at exit when parallel kernels
+    # are launched from several Python threads, so other threads blend serially without the GIL
+    @njit(fastmath=True, cache=True, nogil=True)
+    def _blend_rows_serial(media, overlay, out):
+        for y in range(media.shape[0]):
+            _blend_row(media, overlay, out, y)
+
+
+def _blend_opaque(media: Image.Image, overlay: Image.Image, box: tuple[int, int, int, int]) -> Image.Image:
+    """
+    Blend an RGBA overlay onto opaque RGB media with the compiled Numba kernel.
+
+    Rows are blended in parallel and the result is RGB right away, so neither
+    an RGBA copy of the media nor a final conversion to RGB is needed.
+    Only the pixels inside `box` are blended, in place on a copy of the media.
+    Outside of the main thread, e.g. in `combine_media_batch`, and in process_data workers
+    rows are blended serially.
+    """
+    left, top, right, bottom = box
+    out = np.array(media)
+    region = out[top:bottom, left:right]
+    parallel = _parallel_blend and threading.current_thread() is threading.main_thread()
+    blend = _blend_rows if parallel else _blend_rows_serial
+    blend(region, np.asarray(overlay)[top:bottom, left:right], region)
+    return Image.fromarray(out)
+
+
+def _save_image(image: Image.Image, output_path: Path, quality: int = JPEG_QUALITY):
+    """
+    Save an RGB image. JPEGs are encoded with libjpeg-turbo when PyTurboJPEG is installed.
+
+    JPEGs are progressive with optimized Huffman tables and 4:2:0 chroma subsampling,
+    which makes them smaller at the same quality for little extra encoding time.
+    """
+    if output_path.suffix == ".jpeg":
+        if _turbojpeg is not None:
+            # progressive mode always uses optimized Huffman tables in libjpeg-turbo
+            data = _turbojpeg.encode(np.asarray(image), quality=quality, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420, flags=TJFLAG_PROGRESSIVE)
+            output_path.write_bytes(data)
+        else:
+            image.save(output_path, "JPEG", quality=quality, optimize=True, progressive=True, subsampling=2)
+    elif output_path.suffix == ".webp":
+        image.save(output_path, quality=quality)
+    else:
+        image.save(output_path)
+
+
+def _load_vips_image(source: ImageSource) -> "pyvips.Image":
+    if isinstance(source, io.BytesIO):
+        return pyvips.Image.new_from_buffer(source.getvalue(), "", access="sequential")
+    return pyvips.Image.new_from_file(str(source), access="sequential")
+
+
+def _overlay_image_vips(media_source: ImageSource, overlay_source: ImageSource, output_path: Path, quality: int = JPEG_QUALITY):
+    """
+    Alpha composite an overlay onto an image with libvips.
+
+    libvips evaluates the pipeline in tiles on all cores, so the full size
+    RGBA intermediates Pillow needs are never materialized.
+    """
+    media = _load_vips_image(media_source)
+    overlay = _load_vips_image(overlay_source)
+    if (overlay.width, overlay.height) != (media.width, media.height):
+        overlay = overlay.resize(media.width / overlay.width, vscale=media.height / overlay.height, kernel="linear")
+
+    combined = media.composite2(overlay, "over")
+    if output_path.suffix == ".jpeg":
+        options = {"Q": quality, "optimize_coding": True, "interlace": True, "subsample_mode": "on"}
+    elif output_path.suffix == ".webp":
+        options = {"Q": quality}
+    else:
+        options = {}
+    # drop the alpha band like the Pillow path does
+    combined.extract_band(0, n=3).write_to_file(str(output_path), strip=True, **options)
+
+
+def _overlay_video(media_path: Path, overlay_source: ImageSource, output_path: Path, codec: str, encoder_slots=None, ffmpeg_threads: Optional[int] = None):
+    """
+    Burn an overlay into a video with a single ffmpeg call.
+
+    The overlay is scaled to the video size and composited inside the ffmpeg filter graph,
+    so no frame passes through Python. The audio stream is copied without re-encoding.
+    An overlay held in memory is piped to ffmpeg instead of being written to disk.
+
+    Hardware encodes take a slot of `encoder_slots` and ffmpeg runs `ffmpeg_threads` threads.
+    Both default to the values process_data gives its worker processes.
+    """
+    if encoder_slots is None:
+        encoder_slots = _hardware_encoder_slots
+    if ffmpeg_threads is None:
+        ffmpeg_threads = _ffmpeg_threads
+    infos = _video_infos(media_path)
+    if infos is None:
+        raise ValueError(f"Not a video file: {media_path}")
+    width, height = infos["video_size"]
+    if abs(infos.get("video_rotation", 0)) in (90, 270):
+        # ffmpeg rotates the decoded frames, so the overlay has to match the rotated size
+        width, height = height, width
+
+    if isinstance(overlay_source, io.BytesIO):
+        overlay_input = ["-f", "image2pipe", "-i", "pipe:0"]
+        stdin_data = overlay_source.getvalue()
+    else:
+        overlay_input = ["-nostdin", "-i", str(overlay_source)]
+        stdin_data = None
+
+    command = [
+        FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error",
+        "-threads", str(ffmpeg_threads), "-i", str(media_path),
+        *overlay_input,
+        # the overlay is decoded, scaled and converted to YUVA once when the graph starts,
+        # then blended onto the 4:2:0 frames without converting them to RGB.
+        # If the overlay already has the video size, swscale only converts the colors.
+        "-filter_complex",
+        f"[1:v]scale={width}:{height}:flags=fast_bilinear:out_color_matrix=bt709,format=yuva420p[ovr];"
+        f"[0:v][ovr]overlay=0:0:format=yuv420[v]",
+        "-map", "[v]", "-map", "0:a?",
+        "-c:v", codec, "-pix_fmt", "yuv420p",
+        "-c:a", "copy",
+        "-threads", str(ffmpeg_threads), "-filter_complex_threads", str(ffmpeg_threads),
+    ]
+    if codec == SOFTWARE_ENCODER:
+        # constant quality, veryfast trades a little file size for a lot of encoding speed
+        command += ["-preset", "veryfast", "-crf", "20"]
+    else:
+        # hardware encoders default to a low bitrate
+        command += ["-preset", "fast", "-b:v", "5M"]
+    command.append(str(output_path))
+
+    with encoder_slots if codec != SOFTWARE_ENCODER and encoder_slots is not None else nullcontext():
+        result = subprocess.run(command, input=stdin_data, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed for {media_path}: {result.stderr.decode(errors='replace').strip()}")
+
+
+def _find_member(members: list[zipfile.ZipInfo], keyword: str, archive_path: Path) -> zipfile.ZipInfo:
+    """Return the single archive member whose filename contains the keyword."""
+    found = [m for m in members if keyword in PurePosixPath(m.filename).name.lower()]
+    if len(found) != 1:
+        raise ValueError(f"Expected exactly 1 {keyword} file, found {len(found)} in {archive_path}")
+    return found[0]
+
+
+def _read_image_member(zf: zipfile.ZipFile, member: zipfile.ZipInfo) -> Optional[io.BytesIO]:
+    """Read an archive member into memory, or return None if it is not an image."""
+    with zf.open(member) as stream:
+        try:
+            with Image.open(stream):
+                pass
+        except Exception:
+            return None
+    return io.BytesIO(zf.read(member))
+
+
+def _combine_archive(archive_path: Path, output_path: Path, codec: str, quality: int = JPEG_QUALITY) -> Path:
+    """
+    Combine the media and overlay file stored in an archive.
+
+    ZIP archives are read in memory: images are decoded straight from the archive members,
+    only a video is extracted to disk because ffmpeg needs to seek in it. Other archive
+    formats are unpacked into a temporary directory.
+    """
+    if archive_path.suffix.lower() != ".zip":
+        with _unpack_archive(archive_path) as temp:
+            media, overlay = get_media_and_overlay_file(temp)
+            return _combine_media(media, overlay, output_path, codec, quality)
+
+    # ZipFile parses the central directory, a separate is_zipfile check would read it twice
+    try:
+        zf = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a valid ZIP archive: {archive_path}") from e
+
+    with zf:
+        members = [m for m in zf.infolist() if not m.is_dir()]
+        if len(members) != 2:
+            raise ValueError(f"Archive must contain exactly 2 files: {archive_path}")
+        media_member = _find_member(members, "main", archive_path)
+        overlay_member = _find_member(members, "overlay", archive_path)
+
+        overlay = _read_image_member(zf, overlay_member)
+        if overlay is None:
+            raise ValueError(f"Overlay is not an image: {overlay_member.filename} in {archive_path}")
+        media = _read_image_member(zf, media_member)
+
+        if media is not None:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            return _overlay_image(media, overlay, output_path, quality)
+
+        # only the video is written to disk, ffmpeg reads the overlay from a pipe
+        with tempfile.TemporaryDirectory() as tmp:
+            media_path = Path(zf.extract(media_member, tmp))
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path = output_path.with_suffix(".mp4")
+            _overlay_video(media_path, overlay, output_path, codec)
+            return output_path
+
+
+def combine_media(media_path: Path, overlay_path: Path, output_path: Path, hwaccel: str = "auto", quality: int = JPEG_QUALITY) -> Path:
     """
     Combines a media file with an overlay.
     
     Overlays an image on top of a media file (image or video) and saves
-    the result. For images, the output type is inferred from the media type. For videos, outputs an MP4 with
-    the overlay positioned at center. In both cases, the overlay is resized to match the media size if necessary.
+    the result. For images, the output type is inferred from the media type. For videos, outputs an MP4
+    encoded by ffmpeg with the audio stream copied. In both cases, the overlay is resized to match the media size if necessary.
 
     Args:
         media_path: Path to the media file (image or video).
         overlay_path: Path to the overlay file.
         output_path: Path where the combined media will be saved. May not include an extension!
+        hwaccel: Video encoder selection. "auto" uses a hardware H.264 encoder (NVENC, QSV,
+            VideoToolbox, AMF) if one is available, "none" forces libx264, any other value is
+            passed to ffmpeg as the encoder name.
+        quality: Quality of JPEG and WebP outputs, from 1 to 100. Defaults to 85.
 
     Returns:
         Path to the output file with the appropriate extension.
@@ -93,9 +451,18 @@ def combine_media(media_path: Path, overlay_path: Path, output_path: Path) -> Pa
     Raises:
         FileNotFoundError: If media or overlay file does not exist.
     """
-    if not media_path.exists() or not media_path.is_file():
+    return _combine_media(media_path, overlay_path, output_path, _get_video_encoder(hwaccel), quality)
+
+
+def _combine_media(media_path: Path, overlay_path: Path, output_path: Path, codec: str, quality: int = JPEG_QUALITY, encoder_slots=None, ffmpeg_threads: Optional[int] = None) -> Path:
+    """
+    Combine a media file with an overlay, videos are encoded with the resolved ffmpeg encoder `codec`.
+
+    `encoder_slots` and `ffmpeg_threads` are passed to `_overlay_video`.
+    """
+    if not media_path.is_file():
         raise FileNotFoundError(f"Media file not found: {media_path}")
-    if not overlay_path.exists() or not overlay_path.is_file():
+    if not overlay_path.is_file():
         raise FileNotFoundError(f"Overlay file not found: {overlay_path}")
     if output_path.suffix != "":
         raise ValueError(f"Output path should not have an extension: {output_path}")
@@ -103,34 +470,12 @@ def combine_media(media_path: Path, overlay_path: Path, output_path: Path) -> Pa
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if _is_image(media_path):    
-        ext = _get_image_extension(media_path)
-
-        with Image.open(overlay_path).convert("RGBA") as overlay:
-            with Image.open(media_path).convert("RGBA") as media:
-                if media.size != overlay.size:
-                    overlay = overlay.resize(media.size)
-
-                combined = Image.alpha_composite(media, overlay)
-                output_path = output_path.with_suffix(f".{ext}")
-                combined.convert("RGB").save(output_path)
+    if _is_image(media_path):
+        output_path = _overlay_image(media_path, overlay_path, output_path, quality)
 
     elif _is_video(media_path):
-        video = VideoFileClip(media_path)
-        with Image.open(overlay_path).convert("RGBA") as overlay:
-            if video.size != overlay.size:
-                overlay = overlay.resize(video.size)
-        overlay_clip = ImageClip(overlay_path).with_duration(video.duration).with_position(("center", "center"))
-        # .resize(newsize=video.size) #? this results in a permission error: "used by another process"
-
-        final = CompositeVideoClip([video, overlay_clip])
         output_path = output_path.with_suffix(".mp4")
-        final.write_videofile(
-            output_path,
-            audio=True
-        )
-        video.close()
-        final.close()
+        _overlay_video(media_path, overlay_path, output_path, codec, encoder_slots, ffmpeg_threads)
 
     else:
         raise ValueError(f"Unsupported media type: {media_path}")
@@ -138,11 +483,103 @@ def combine_media(media_path: Path, overlay_path: Path, output_path: Path) -> Pa
     return output_path
 
 
+def combine_media_batch(jobs: Iterable[tuple[Path, Path, Path]], workers: int = 4, hwaccel: str = "auto", quality: int = JPEG_QUALITY) -> list[Path]:
+    """
+    Combines many media files with their overlays in a thread pool.
+
+    Decoding, compositing and encoding happen in Pillow, libvips or ffmpeg outside the GIL,
+    so threads overlap the I/O and CPU work of different jobs in a single process.
+    As in `process_data`, at most two hardware video encodes run at a time and each
+    ffmpeg process gets a share of the cores.
+
+    Args:
+        jobs: Tuples of media path, overlay path and output path, as passed to `combine_media`.
+        workers: Number of threads, at least 1. Defaults to 4.
+        hwaccel: Video encoder selection, see `combine_media`. Defaults to "auto".
+        quality: Quality of JPEG and WebP outputs, see `combine_media`. Defaults to 85.
+
+    Returns:
+        Paths to the output files, in the order of the jobs. Jobs that fail are skipped with a warning.
+
+    Raises:
+        ValueError: If `workers` is smaller than 1.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
+    # register all Pillow plugins once instead of lazily in the first threads
+    Image.init()
+    codec = _get_video_encoder(hwaccel)
+
+    # the limits are passed to each job, so concurrent batches don't interfere. Inside a
+    # process_data worker the batch shares the worker's semaphore and splits its thread budget.
+    encoder_slots = _hardware_encoder_slots if _hardware_encoder_slots is not None else threading.BoundedSemaphore(MAX_HARDWARE_ENCODES)
+    ffmpeg_threads = max(1, (_ffmpeg_threads or os.cpu_count() or 1) // workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (media, executor.submit(_combine_media, media, overlay, output, codec, quality, encoder_slots, ffmpeg_threads))
+            for media, overlay, output in jobs
+        ]
+        outputs = []
+        for media, future in futures:
+            try:
+                outputs.append(future.result())
+            except Exception as e:
+                warnings.warn(f"Skipping {media} because an error occurred: {e}")
+    return outputs
+
+
 # ___________________________________________________________________
 # Core Processing
 
 
-def process_data(input_dir: Path, output_dir: Path, overwrite: bool = False ):
+def _init_worker(hardware_encoder_slots, threads: int):
+    """
+    Share the hardware encoder semaphore and the thread budget with a worker process.
+
+    ffmpeg and libvips each use at most `threads` threads and the Numba blend kernel runs
+    serially, otherwise every worker would start a thread per core and the workers together
+    about cores² threads.
+    """
+    global _hardware_encoder_slots, _ffmpeg_threads, _parallel_blend
+    _hardware_encoder_slots = hardware_encoder_slots
+    _ffmpeg_threads = threads
+    _parallel_blend = False
+    if pyvips is not None:
+        pyvips.concurrency_set(threads)
+
+
+def _process_entry(entry: Path, is_dir: bool, output_dir: Path, codec: str, preserve_times: bool, quality: int):
+    """
+    Process a single entry of the input directory. Errors are raised to the caller.
+
+    `is_dir` comes from the directory scan, so the entry is not stat'ed again.
+    `codec` is the video encoder resolved by `process_data`.
+    """
+    base_name = entry.stem
+    # copyfile lets the kernel copy the data (copy_file_range/sendfile), copy2 also copies timestamps
+    copy = shutil.copy2 if preserve_times else shutil.copyfile
+
+    if _is_archive(entry):
+        _combine_archive(entry, output_dir / base_name, codec, quality)
+
+    elif is_dir:
+        media, overlay = get_media_and_overlay_file(entry)
+        _combine_media(media, overlay, output_dir / base_name, codec, quality)
+
+    elif _is_image(entry):
+        ext = _get_image_extension(entry)
+        copy(entry, output_dir / f"{entry.stem}.{ext}")
+
+    elif _is_video(entry):
+        copy(entry, output_dir / entry.name)
+
+    else:
+        raise ValueError(f"Unsupported file: {entry}")
+
+
+def process_data(input_dir: Path, output_dir: Path, overwrite: bool = False, hwaccel: str = "auto", workers: Optional[int] = None, preserve_times: bool = False, quality: int = JPEG_QUALITY):
     """
     Processes media files from the input directory and saves the results to the output directory.
 
@@ -151,47 +588,79 @@ def process_data(input_dir: Path, output_dir: Path, overwrite: bool = False ):
     - Image files, which are copied with the missing extension added to the filename.
     - archive files, which are unzipped, and the contained media files (image or video) are combined with an overlay.
     - Folders containing media and overlay files, which are processed similarly to archives.
+
+    Entries are independent of each other and are processed in parallel worker processes.
+    At most two hardware video encodes run at a time. Copies only contain the file data
+    unless `preserve_times` is set.
     
     Args:
         input_dir (Path): The directory containing the media files to be processed.
         output_dir (Path): The directory where the processed files will be saved.
         overwrite (bool, optional): If True, existing files in the output directory will be overwritten. Defaults to False.
+        hwaccel (str, optional): Video encoder selection, see `combine_media`. Defaults to "auto".
+        workers (int, optional): Number of worker processes. Defaults to the number of CPU cores,
+            1 processes all entries in the calling process.
+        preserve_times (bool, optional): If True, copied files keep their timestamps and permissions. Defaults to False.
+        quality (int, optional): Quality of combined JPEG and WebP images, see `combine_media`. Defaults to 85.
     
     Raises:
         ValueError: If the input directory does not exist or is not a directory.
     """
-    if not input_dir.exists() or not input_dir.is_dir():
+    if not input_dir.is_dir():
         raise ValueError(f"Input directory does not exist: {input_dir}")
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    for entry in input_dir.iterdir():
-        try:
-            base_name = entry.stem
+    with os.scandir(input_dir) as it:
+        entries = [(Path(e.path), e.is_dir()) for e in it]
 
-            if _already_exists(base_name, output_dir) and not overwrite:
+    if not overwrite:
+        existing = _existing_stems(output_dir)
+        pending = []
+        for entry, is_dir in entries:
+            if _already_exists(entry.stem, existing):
                 continue
-
-            if _is_archive(entry):
-                with _unpack_archive(entry) as temp:
-                    media, overlay = get_media_and_overlay_file(temp)
-                    combine_media(media, overlay, output_dir / base_name)
-
-            elif entry.is_dir():
-                media, overlay = get_media_and_overlay_file(entry)
-                combine_media(media, overlay, output_dir / base_name)
-
-            elif _is_video(entry):
-                shutil.copy2(entry, output_dir / entry.name)
-
-            elif _is_image(entry):
-                ext = _get_image_extension(entry)
-                shutil.copy2(entry, output_dir / f"{entry.stem}.{ext}")
-
-            else:
-                raise ValueError(f"Unsupported file: {entry}")
-        except Exception as e:
-            warnings.warn(f"Skipping {entry} because an error occurred: {e}")
-            continue
+            # the entry will write this name, so later entries with the same name are skipped
+            existing.add(entry.stem.lower())
+            pending.append((entry, is_dir))
+        entries = pending
+    else:
+        # entries with the same name would write the same file from different workers at once,
+        # only the last one is processed, which is the entry that won in a serial run
+        latest = {}
+        for entry, is_dir in entries:
+            latest[entry.stem.lower()] = (entry, is_dir)
+        entries = list(latest.values())
+
+    workers = workers or os.cpu_count() or 1
+    # resolved once here: the hardware probes of many workers at once could exceed the GPU's
+    # encoder sessions, and the workers that failed would silently fall back to libx264
+    codec = _get_video_encoder(hwaccel)
+
+    if workers == 1:
+        for entry, is_dir in entries:
+            try:
+                _process_entry(entry, is_dir, output_dir, codec, preserve_times, quality)
+            except Exception as e:
+                warnings.warn(f"Skipping {entry} because an error occurred: {e}")
+        return True
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            multiprocessing.BoundedSemaphore(MAX_HARDWARE_ENCODES),
+            max(1, (os.cpu_count() or 1) // workers),
+        ),
+    ) as executor:
+        futures = {
+            executor.submit(_process_entry, entry, is_dir, output_dir, codec, preserve_times, quality): entry
+            for entry, is_dir in entries
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                warnings.warn(f"Skipping {futures[future]} because an error occurred: {e}")
         
-    return True
\ No newline at end of file
+    return True
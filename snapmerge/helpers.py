@@ -1,65 +1,191 @@
+import json
+import os
+import shutil
+import stat
+import subprocess
+from functools import lru_cache
 from pathlib import Path
-from moviepy import VideoFileClip
-from PIL import Image
+from typing import Optional
+
+from moviepy.config import FFMPEG_BINARY
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+import PIL
 
 
 # ___________________________________________________________________
 # Constants
 
 
-ARCHIVE_EXT = {".zip", ".tar", ".tar.gz", ".tgz"}
+ARCHIVE_EXT = frozenset({".zip", ".tar", ".tar.gz", ".tgz"})
+
+# Image format of well known image extensions, as reported by Pillow
+IMAGE_FORMATS = {
+    ".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp",
+    ".gif": "gif", ".bmp": "bmp", ".tif": "tiff", ".tiff": "tiff",
+}
+IMAGE_EXT = frozenset(IMAGE_FORMATS)
+VIDEO_EXT = frozenset({".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm"})
+
+# Leading bytes of the image formats above, WebP is checked separately (RIFF....WEBP)
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png", b"\xff\xd8\xff": "jpeg", b"GIF87a": "gif", b"GIF89a": "gif",
+    b"BM": "bmp", b"II*\x00": "tiff", b"MM\x00*": "tiff",
+}
+
+# Combined once at import, these are checked for every file
+NOT_IMAGE_EXT = VIDEO_EXT | ARCHIVE_EXT
+NOT_VIDEO_EXT = IMAGE_EXT | ARCHIVE_EXT
+
+# ffprobe is not bundled with moviepy's ffmpeg, it is used for probing when installed
+FFPROBE_BINARY = shutil.which("ffprobe")
+# seconds, ffprobe only reads headers. A probe that takes longer counts as not a video
+PROBE_TIMEOUT = 10
+
+SOFTWARE_ENCODER = "libx264"
+HARDWARE_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_videotoolbox", "h264_amf")
 
 
 # ___________________________________________________________________
 # Image and Video Identifier
 
 
+def _stat_or_none(path: Path) -> Optional[os.stat_result]:
+    """Stat a path with a single syscall, or return None if it does not exist."""
+    try:
+        return path.stat()
+    except OSError:
+        return None
+
+
 def _get_image_extension(image_path: Path) -> str:
     """"Return image file extension based on its format."""
-    if not image_path.exists() or not _is_image(image_path):
+    suffix = image_path.suffix.lower()
+    if suffix in IMAGE_EXT and image_path.is_file():
+        return IMAGE_FORMATS[suffix]
+
+    ext = _sniff_image_format(image_path)
+    if ext is None:
         raise ValueError(f"File is not an image or doesn't exist: {image_path}")
-    
-    with Image.open(image_path) as image:
-        return image.format.lower()
+    return ext
 
 
-def _is_image(image_path: Path) -> bool:
-    if not image_path.exists() or not image_path.is_file():
-        return False
-    
+def _sniff_image_format(image_path: Path) -> Optional[str]:
+    """
+    Return the image format from the leading bytes of a file, or None if it is not an image.
+
+    Reads 12 bytes instead of letting Pillow open the file and walk its plugin registry.
+    """
     try:
-        with Image.open(image_path):
-            return True
-    except Exception:
+        with open(image_path, "rb") as f:
+            head = f.read(12)
+    except OSError:
+        return None
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, ext in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def _sniff_image(image_path: Path) -> bool:
+    return _sniff_image_format(image_path) is not None
+
+
+def _is_image(image_path: Path) -> bool:
+    # the extension is trusted if there is a well known one, only other files are sniffed
+    suffix = image_path.suffix.lower()
+    if suffix in IMAGE_EXT:
+        return image_path.is_file()
+    if suffix in NOT_IMAGE_EXT:
         return False
+    return _sniff_image(image_path)
     
 
-def _is_video(video_path: Path) -> bool:
-    if not video_path.exists() or not video_path.is_file():
-        return False
+def _ffprobe_video(path: str) -> Optional[dict]:
+    """
+    Read size and rotation of the first video stream with ffprobe, or return None.
+
+    ffprobe only reads the container headers, ffmpeg_parse_infos runs ffmpeg and parses its log.
+    """
+    result = subprocess.run(
+        [FFPROBE_BINARY, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height:stream_tags=rotate:stream_side_data=rotation",
+         "-of", "json", path],
+        capture_output=True,
+        timeout=PROBE_TIMEOUT,
+    )
+    if result.returncode != 0:
+        return None
+    streams = json.loads(result.stdout).get("streams")
+    if not streams:
+        return None
+    stream = streams[0]
+    # newer ffmpeg versions report the display matrix rotation, older ones a rotate tag
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    return {
+        "video_found": True,
+        "video_size": [stream["width"], stream["height"]],
+        "video_rotation": int(float(rotation)),
+    }
+
+
+@lru_cache(maxsize=256)
+def _probe_video(path: str, mtime_ns: int, size: int) -> Optional[dict]:
+    """
+    Return the stream information of a file, or None if it has no video stream.
 
+    A single ffprobe call per file if ffprobe is installed, ffmpeg otherwise, shared by the
+    video check and the encoder. The information contains at least `video_size` and
+    `video_rotation`. Modification time and size are part of the cache key.
+    The result must not be modified.
+    """
     try:
-        clip = VideoFileClip(video_path)
-        clip.close()
-        return True
+        if FFPROBE_BINARY is not None:
+            return _ffprobe_video(path)
+        infos = ffmpeg_parse_infos(path)
     except Exception:
-        return False
-    
+        return None
+    return infos if infos.get("video_found") else None
+
 
-def _is_media(path: Path) -> bool:
-    return _is_image(path) or _is_video(path)
+def _video_infos(video_path: Path) -> Optional[dict]:
+    """Return the cached stream information of a video file, or None."""
+    suffix = video_path.suffix.lower()
+    if suffix in NOT_VIDEO_EXT:
+        return None
+    st = _stat_or_none(video_path)
+    if st is None or not stat.S_ISREG(st.st_mode):
+        return None
+    return _probe_video(str(video_path), st.st_mtime_ns, st.st_size)
+
+
+def _is_video(video_path: Path) -> bool:
+    return _video_infos(video_path) is not None
 
 
 # ___________________________________________________________________
 # Check Duplicates
 
 
-def _already_exists(name: str, output_dir: Path) -> bool:
+def _existing_stems(output_dir: Path) -> set[str]:
+    """
+    Collect the lowercase base names of all files in the output directory.
+
+    Built once per batch, so each duplicate check is a set lookup instead of a directory scan.
+    """
+    with os.scandir(output_dir) as it:
+        return {Path(e.name).stem.lower() for e in it if e.is_file()}
+
+
+def _already_exists(name: str, existing: set[str]) -> bool:
     """
     Check whether a file with the given base name already exists in the output
     directory, regardless of file extension.
     """
-    return any(f.is_file() and f.stem.lower() == name.lower() for f in output_dir.iterdir())
+    return name.lower() in existing
 
 
 # ___________________________________________________________________
@@ -67,4 +193,61 @@ def _already_exists(name: str, output_dir: Path) -> bool:
 
 def _is_archive(path: Path) -> bool:
     """Check if the given path is a supported archive file and is valid."""
-    return path.suffix.lower() in ARCHIVE_EXT
\ No newline at end of file
+    return path.suffix.lower() in ARCHIVE_EXT
+
+
+# ___________________________________________________________________
+# Video Encoder Detection
+
+
+@lru_cache(maxsize=None)
+def _get_video_encoder(hwaccel: str = "auto") -> str:
+    """
+    Resolve the H.264 encoder passed to ffmpeg.
+
+    "auto" picks the first hardware encoder that ffmpeg lists and that can
+    actually encode a test frame, falling back to libx264. "none" always uses
+    libx264, any other value is used as the encoder name as is.
+    The result is cached, so ffmpeg is only probed once per process.
+    """
+    if hwaccel == "none":
+        return SOFTWARE_ENCODER
+    if hwaccel != "auto":
+        return hwaccel
+
+    try:
+        listed = subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return SOFTWARE_ENCODER
+
+    for encoder in HARDWARE_ENCODERS:
+        if encoder in listed and _can_encode(encoder):
+            return encoder
+    return SOFTWARE_ENCODER
+
+
+def _can_encode(encoder: str) -> bool:
+    """Check whether ffmpeg can encode a single frame with the given encoder."""
+    # Encoders are compiled into ffmpeg even if the matching GPU or driver is missing.
+    try:
+        result = subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+             "-f", "lavfi", "-i", "color=size=256x256",
+             "-frames:v", "1", "-c:v", encoder, "-f", "null", "-"],
+            capture_output=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+# ___________________________________________________________________
+# Pillow Build
+
+
+def _pillow_simd_active() -> bool:
+    """Check whether the installed Pillow is the Pillow-SIMD fork, which versions its releases as `.postN`."""
+    return ".post" in PIL.__version__
\ No newline at end of file
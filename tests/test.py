@@ -2,9 +2,19 @@ import unittest
 from pathlib import Path
 import tempfile
 import shutil
+import zipfile
+import os
+import subprocess
+import threading
+import time
+from unittest import mock
+import numpy as np
 from PIL import Image
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
-from snapmerge import process_data, combine_media, get_media_and_overlay_file
+from snapmerge import core, process_data, combine_media, combine_media_batch, get_media_and_overlay_file
+from snapmerge import helpers
+from snapmerge.helpers import _get_video_encoder
 
 class TestSnapMerge(unittest.TestCase):
 
@@ -44,20 +54,201 @@ class TestSnapMerge(unittest.TestCase):
         self.assertTrue(combined_path.exists())
         self.assertTrue(combined_path.suffix in [".png", ".jpg"])
 
+    def test_combine_media_batch(self):
+        jobs = [(self.image_path, self.overlay_path, self.output_path / f"combined{i}") for i in range(3)]
+        jobs.append((self.output_path / "missing.png", self.overlay_path, self.output_path / "missing"))
+        with self.assertWarns(UserWarning):
+            outputs = combine_media_batch(jobs, workers=2)
+        self.assertEqual([p.stem for p in outputs], ["combined0", "combined1", "combined2"])
+        self.assertTrue(all(p.exists() for p in outputs))
+
+    def test_combine_media_batch_pillow(self):
+        # without libvips the JPEG jobs are blended by Pillow (and Numba, if installed) in the pool threads
+        media_path = self.output_path / "photo_main.jpg"
+        Image.new("RGB", (200, 150), (200, 20, 20)).save(media_path)
+        jobs = [(media_path, self.overlay_path, self.output_path / f"photo{i}") for i in range(8)]
+        with mock.patch.object(core, "pyvips", None):
+            outputs = combine_media_batch(jobs, workers=4)
+        self.assertEqual(len(outputs), 8)
+        for path in outputs:
+            with Image.open(path) as image:
+                self.assertEqual((image.format, image.size), ("JPEG", (200, 150)))
+
+    def test_combine_media_batch_hardware_slots(self):
+        with zipfile.ZipFile(self.test_data_dir / "movie2.zip") as zipf:
+            zipf.extractall(self.output_path / "movie")
+        media, overlay = get_media_and_overlay_file(self.output_path / "movie")
+        running, peak, threads = {"a": 0, "b": 0}, {"a": 0, "b": 0}, set()
+        lock = threading.Lock()
+
+        def fake_encode(command, **kwargs):
+            # stands in for ffmpeg and records how many encodes of each batch overlap
+            batch = Path(command[-1]).name[0]
+            with lock:
+                running[batch] += 1
+                peak[batch] = max(peak[batch], running[batch])
+                threads.add(command[command.index("-threads") + 1])
+            time.sleep(0.05)
+            with lock:
+                running[batch] -= 1
+            return subprocess.CompletedProcess(command, 0, b"", b"")
+
+        def run_batch(batch, count, results):
+            jobs = [(media, overlay, self.output_path / f"{batch}{i}") for i in range(count)]
+            results[batch] = combine_media_batch(jobs, workers=4, hwaccel="h264_nvenc")
+
+        # two batches at the same time, the shorter one finishes while the other is still encoding
+        results = {}
+        with mock.patch.object(core.subprocess, "run", side_effect=fake_encode):
+            batches = [threading.Thread(target=run_batch, args=args) for args in (("a", 2, results), ("b", 8, results))]
+            for batch in batches:
+                batch.start()
+            for batch in batches:
+                batch.join()
+        self.assertEqual((len(results["a"]), len(results["b"])), (2, 8))
+        self.assertEqual(peak["b"], core.MAX_HARDWARE_ENCODES)
+        self.assertEqual(threads, {str(max(1, (os.cpu_count() or 1) // 4))})
+        self.assertIsNone(core._hardware_encoder_slots)
+
+        with self.assertRaises(ValueError):
+            combine_media_batch([], workers=0)
+
+    def test_init_worker_thread_budget(self):
+        previous = (core._hardware_encoder_slots, core._ffmpeg_threads, core._parallel_blend)
+        vips_threads = core.pyvips.concurrency_get() if core.pyvips is not None else None
+        try:
+            core._init_worker(None, 1)
+            self.assertEqual(core._ffmpeg_threads, 1)
+            self.assertFalse(core._parallel_blend)
+            if core.pyvips is not None:
+                self.assertEqual(core.pyvips.concurrency_get(), 1)
+        finally:
+            core._hardware_encoder_slots, core._ffmpeg_threads, core._parallel_blend = previous
+            if vips_threads is not None:
+                core.pyvips.concurrency_set(vips_threads)
+
+    def test_overlay_cache(self):
+        core._load_overlay.cache_clear()
+        first = core._prepare_overlay(self.overlay_path, (50, 50))
+        second = core._prepare_overlay(self.overlay_path, (50, 50))
+        info = core._load_overlay.cache_info()
+        self.assertIs(first, second)
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+        # a different size replaces the cached overlay
+        core._prepare_overlay(self.overlay_path, (40, 40))
+        self.assertEqual(core._load_overlay.cache_info().misses, 2)
+        self.assertEqual(core._load_overlay.cache_info().currsize, 1)
+
+    def test_overlay_image_pillow_paths(self):
+        rng = np.random.default_rng(0)
+        rgb = Image.fromarray(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8))
+        rgba = Image.fromarray(rng.integers(0, 256, (120, 160, 4), dtype=np.uint8))
+        # half the size of the media, only a band in the middle is visible
+        pixels = np.zeros((60, 80, 4), dtype=np.uint8)
+        pixels[20:40, 10:70] = rng.integers(0, 256, (20, 60, 4), dtype=np.uint8)
+        partial = Image.fromarray(pixels)
+        transparent = Image.new("RGBA", (160, 120))
+
+        cases = {"partial": (rgb, partial), "rgba media": (rgba, partial), "transparent": (rgb, transparent)}
+        blenders = {"pillow": None, "numba": core.njit} if core.njit is not None else {"pillow": None}
+        for blender, njit in blenders.items():
+            for case, (media, overlay) in cases.items():
+                with self.subTest(blender=blender, case=case):
+                    media_path = self.output_path / f"{blender} {case}_main.png"
+                    overlay_path = self.output_path / f"{blender} {case}_overlay.png"
+                    media.save(media_path)
+                    overlay.save(overlay_path)
+                    expected = Image.alpha_composite(media.convert("RGBA"), core._fit_overlay(overlay, media.size)).convert("RGB")
+
+                    with mock.patch.object(core, "pyvips", None), mock.patch.object(core, "njit", njit):
+                        output = core._overlay_image(media_path, overlay_path, self.output_path / f"{blender} {case}")
+                    with Image.open(output) as combined:
+                        np.testing.assert_array_equal(np.asarray(combined.convert("RGB")), np.asarray(expected))
+
+    def test_combine_video_media(self):
+        with zipfile.ZipFile(self.test_data_dir / "movie2.zip") as zipf:
+            zipf.extractall(self.output_path / "movie")
+        media, overlay = get_media_and_overlay_file(self.output_path / "movie")
+
+        combined_path = combine_media(media, overlay, self.output_path / "combined", hwaccel="none")
+        self.assertEqual(combined_path.suffix, ".mp4")
+        infos = ffmpeg_parse_infos(str(combined_path))
+        self.assertEqual(infos["video_size"], ffmpeg_parse_infos(str(media))["video_size"])
+        self.assertTrue(infos["audio_found"])
+
+    def test_ffprobe_video(self):
+        # output of ffprobe -show_entries stream=width,height:stream_tags=rotate:stream_side_data=rotation -of json
+        display_matrix = b"""{
+    "programs": [],
+    "stream_groups": [],
+    "streams": [
+        {
+            "width": 1920,
+            "height": 1080,
+            "side_data_list": [
+                {
+                    "side_data_type": "Display Matrix",
+                    "rotation": -90
+                }
+            ]
+        }
+    ]
+}"""
+        rotate_tag = b"""{
+    "programs": [],
+    "streams": [
+        {
+            "width": 1280,
+            "height": 720,
+            "tags": {
+                "rotate": "270"
+            }
+        }
+    ]
+}"""
+        no_video = b"""{
+    "programs": [],
+    "streams": []
+}"""
+        cases = [
+            (display_matrix, {"video_found": True, "video_size": [1920, 1080], "video_rotation": -90}),
+            (rotate_tag, {"video_found": True, "video_size": [1280, 720], "video_rotation": 270}),
+            (no_video, None),
+        ]
+        for stdout, expected in cases:
+            with mock.patch.object(helpers.subprocess, "run", return_value=subprocess.CompletedProcess([], 0, stdout, b"")) as run:
+                self.assertEqual(helpers._ffprobe_video("clip.mp4"), expected)
+            self.assertEqual(run.call_args.kwargs["timeout"], helpers.PROBE_TIMEOUT)
+
+        with mock.patch.object(helpers.subprocess, "run", side_effect=subprocess.TimeoutExpired("ffprobe", helpers.PROBE_TIMEOUT)), \
+                mock.patch.object(helpers, "FFPROBE_BINARY", "ffprobe"):
+            self.assertIsNone(helpers._probe_video("stuck.mp4", 0, 0))
+
+    # -----------------------------
+    # Test video encoder selection
+    # -----------------------------
+    def test_video_encoder_selection(self):
+        self.assertEqual(_get_video_encoder("none"), "libx264")
+        self.assertEqual(_get_video_encoder("h264_nvenc"), "h264_nvenc")
+        self.assertIn(_get_video_encoder("auto"), ["libx264", "h264_nvenc", "h264_qsv", "h264_videotoolbox", "h264_amf"])
+
     # -----------------------------
     # Test processing a temp ZIP archive
     # -----------------------------
-    # def test_process_archive_zip(self):
-    #     temp_zip = self.output_path / "archive.zip"
-    #     with zipfile.ZipFile(temp_zip, "w") as zipf:
-    #         zipf.write(self.image_path, arcname="image_main.png")
-    #         zipf.write(self.overlay_path, arcname="image_overlay.png")
-
-    #     # _process_archive returns output_path after combining
-    #     output_file = self.output_path / "output_combined"
-    #     combined_path = _process_archive(temp_zip, output_file)
-    #     self.assertTrue(combined_path.exists())
-    #     self.assertTrue(combined_path.suffix in [".png", ".jpg"])
+    def test_process_archive_zip(self):
+        input_dir = self.output_path / "input"
+        input_dir.mkdir()
+        with zipfile.ZipFile(input_dir / "archive.zip", "w") as zipf:
+            zipf.write(self.image_path, arcname="image_main.png")
+            zipf.write(self.overlay_path, arcname="image_overlay.png")
+
+        output_dir = self.output_path / "output"
+        process_data(input_dir, output_dir)
+        combined_path = output_dir / "archive.png"
+        self.assertTrue(combined_path.exists())
+        with Image.open(combined_path) as combined:
+            self.assertEqual(combined.size, (100, 100))
 
     # -----------------------------
     # Test process_data end-to-end
@@ -73,6 +264,34 @@ class TestSnapMerge(unittest.TestCase):
         output_files = list(self.output_path.iterdir())
         self.assertGreaterEqual(len(output_files), 2)
 
+    def test_process_data_resolves_encoder_once(self):
+        input_dir = self.output_path / "input"
+        input_dir.mkdir()
+        shutil.copy2(self.test_data_dir / "movie2.zip", input_dir / "first.zip")
+        shutil.copy2(self.test_data_dir / "movie2.zip", input_dir / "second.zip")
+        output_dir = self.output_path / "output"
+
+        with mock.patch.object(core, "_get_video_encoder", return_value="libx264") as resolve:
+            process_data(input_dir, output_dir, workers=1, hwaccel="auto")
+        resolve.assert_called_once_with("auto")
+        self.assertEqual(sorted(p.name for p in output_dir.iterdir()), ["first.mp4", "second.mp4"])
+
+    def test_process_data_duplicate_names(self):
+        input_dir = self.output_path / "input"
+        input_dir.mkdir()
+        shutil.copy2(self.image_path, input_dir / "snap.png")
+        Image.new("RGB", (10, 10)).save(input_dir / "snap.jpg")
+
+        output_dir = self.output_path / "output"
+        process_data(input_dir, output_dir)
+        self.assertEqual(len([f for f in output_dir.iterdir() if f.stem == "snap"]), 1)
+
+        # overwriting dispatches only one of the entries, they would write the same output at once
+        shutil.rmtree(output_dir)
+        Image.new("RGB", (10, 10)).save(input_dir / "SNAP", "PNG")
+        process_data(input_dir, output_dir, overwrite=True, workers=2)
+        self.assertEqual(len([f for f in output_dir.iterdir() if f.stem.lower() == "snap"]), 1)
+
     # -----------------------------
     # Test overwrite behavior
     # -----------------------------